@@ -190,6 +190,18 @@ config_definitions: Dict[str, Dict[str, Any]] = {
             "value_type": byte_length
         }
     },
+    "max-file-size": {
+        "description": "Files larger than this size will be skipped entirely."
+                       " Use a whole number followed by one of the following"
+                       " suffixes: b (byte), k (kibibyte), m (mebibyte). By"
+                       " default, files of any size are scanned.",
+        "context": "ALL",
+        "argument_type": "OPTION",
+        "default": None,
+        "meta": {
+            "value_type": byte_length
+        }
+    },
     "match-all": {
         "description": "If set, all possible signatures will be checked "
                        "against each scanned file. Otherwise, only the "
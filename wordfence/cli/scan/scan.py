@@ -8,7 +8,7 @@ from typing import Any, Optional
 
 from wordfence import scanning, api
 from wordfence.api.licensing import LicenseSpecific
-from wordfence.scanning import filtering
+from wordfence.scanning import filtering, matching
 from wordfence.util import caching, updater, pcre
 from wordfence.util.io import StreamReader
 from wordfence.intel.signatures import SignatureSet
@@ -188,6 +188,7 @@ class ScanCommand:
                 chunk_size=self.config.chunk_size,
                 scanned_content_limit=int(self.config.scanned_content_limit),
                 file_filter=self._initialize_file_filter(),
+                max_file_size=self.config.max_file_size,
                 match_all=self.config.match_all,
                 pcre_options=self._get_pcre_options()
             )
@@ -264,6 +265,8 @@ def display_version() -> None:
     print(f"Wordfence CLI {__version__}")
     jit_support_text = 'Yes' if pcre.HAS_JIT_SUPPORT else 'No'
     print(f"PCRE Version: {pcre.VERSION} - JIT Supported: {jit_support_text}")
+    hyperscan_support_text = 'Yes' if matching.HAS_HYPERSCAN else 'No'
+    print(f"Hyperscan Supported: {hyperscan_support_text}")
 
 
 def main(config) -> int:
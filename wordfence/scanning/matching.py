@@ -1,18 +1,37 @@
 import signal
+import threading
+import time
+from contextlib import ExitStack
+from typing import List, Optional, Tuple
 
+from .prefiltering import LiteralPrefilter, extract_literal
 from ..intel.signatures import CommonString, Signature, SignatureSet
 from ..logging import log
 from ..util.pcre import PcrePattern, PcreException, PcreJitStack, \
         PcreOptions, PCRE_DEFAULT_OPTIONS
 
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
 
 DEFAULT_TIMEOUT = 1  # Seconds
+CONTEXT_POOL_SIZE = 1
+"""The number of idle contexts retained by each matcher for reuse"""
+BOUNDARY_WINDOW_SIZE = 64 * 1024
+"""The amount of each chunk retained for matches spanning chunk boundaries"""
 
 
 class TimeoutException(Exception):
     pass
 
 
+class HyperscanException(Exception):
+    pass
+
+
 class MatchResult:
 
     def __init__(self, matches: list):
@@ -33,10 +52,42 @@ class Matcher:
         self.signature_set = signature_set
         self.timeout = timeout
         self.match_all = match_all
+        self._local = threading.local()
+
+    def create_context(self) -> 'MatcherContext':
+        raise NotImplementedError()
+
+    def _get_context_pool(self) -> list:
+        # Contexts are pooled per thread as they may not be shared
+        try:
+            return self._local.context_pool
+        except AttributeError:
+            self._local.context_pool = []
+            return self._local.context_pool
+
+    def acquire_context(self) -> 'MatcherContext':
+        """Return an idle context if one is available, creating one if not"""
+        try:
+            return self._get_context_pool().pop()
+        except IndexError:
+            return self.create_context()
+
+    def release_context(self, context: 'MatcherContext') -> None:
+        context.reset()
+        pool = self._get_context_pool()
+        if len(pool) < CONTEXT_POOL_SIZE:
+            pool.append(context)
 
 
 class MatcherContext:
-    pass
+
+    def finalize(self, jit_stack: PcreJitStack) -> None:
+        """Called once all chunks of a file have been processed"""
+        pass
+
+    def reset(self) -> None:
+        """Prepare the context to be reused for another file"""
+        pass
 
 
 class RegexMatcherContext(MatcherContext):
@@ -44,6 +95,7 @@ class RegexMatcherContext(MatcherContext):
     def __init__(self, matcher):
         self.matcher = matcher
         self.common_string_states = self._initialize_common_string_states()
+        self.found_literals = set()
         self.matches = {}
         self.timeouts = set()
 
@@ -53,12 +105,34 @@ class RegexMatcherContext(MatcherContext):
             states.append(False)
         return states
 
-    def _check_common_strings(self, chunk: bytes) -> list:
+    def reset(self) -> None:
+        states = self.common_string_states
+        states[:] = self.matcher.initial_common_string_states
+        self.found_literals.clear()
+        # Results may still be referenced by queued events, so they are
+        # replaced rather than cleared
+        self.matches = {}
+        self.timeouts = set()
+
+    def _check_literal_common_strings(self, chunk: bytes) -> None:
+        found = self.matcher.literal_prefilter.find(chunk, self.found_literals)
+        for index in found:
+            self.common_string_states[index] = True
+        self.found_literals.update(found)
+
+    def _check_common_strings(
+                self,
+                chunk: bytes,
+                jit_stack: PcreJitStack
+            ) -> list:
         common_string_counts = {}
+        if self.matcher.literal_prefilter is not None:
+            self._check_literal_common_strings(chunk)
         for index, common_string in enumerate(self.matcher.common_strings):
-            if not self.common_string_states[index]:
+            if not self.common_string_states[index] and \
+                    not common_string.prefiltered:
                 try:
-                    match = common_string.pattern.match(chunk)
+                    match = common_string.pattern.match(chunk, jit_stack)
                     if match is not None:
                         self.common_string_states[index] = True
                 except PcreException as e:
@@ -86,17 +160,28 @@ class RegexMatcherContext(MatcherContext):
                 self,
                 signature: Signature,
                 chunk: bytes,
+                jit_stack: PcreJitStack,
                 start: bool = False
             ) -> bool:
         if not signature.is_valid():
-            print('Signature is not valid')
+            # The compilation error has already been logged
+            log.debug(
+                    'Skipping invalid signature %s',
+                    signature.signature.identifier
+                )
             return False
         if signature.anchored_to_start and not start:
             return False
         try:
-            signal.alarm(self.matcher.timeout)
-            match = signature.get_pattern().match(chunk)
-            signal.alarm(0)  # Clear the alarm
+            if self._use_alarm:
+                signal.alarm(self.matcher.timeout)
+            else:
+                started = time.monotonic()
+            match = signature.get_pattern().match(chunk, jit_stack)
+            if self._use_alarm:
+                signal.alarm(0)  # Clear the alarm
+            elif time.monotonic() - started >= self.matcher.timeout:
+                raise TimeoutException()
             if match is not None:
                 self.matches[signature.signature.identifier] = \
                         match.matched_string
@@ -116,13 +201,13 @@ class RegexMatcherContext(MatcherContext):
                 jit_stack: PcreJitStack,
                 start: bool = False,
             ) -> bool:
-        possible_signatures = self._check_common_strings(chunk)
+        possible_signatures = self._check_common_strings(chunk, jit_stack)
         for signature in self.matcher.signatures_without_common_strings:
-            if self._match_signature(signature, chunk, start) and \
+            if self._match_signature(signature, chunk, jit_stack, start) and \
                     not self.matcher.match_all:
                 return True
         for signature in possible_signatures:
-            if self._match_signature(signature, chunk, start) and \
+            if self._match_signature(signature, chunk, jit_stack, start) and \
                     not self.matcher.match_all:
                 return True
         return False
@@ -131,6 +216,13 @@ class RegexMatcherContext(MatcherContext):
         def handle_timeout(signum, frame):
             raise TimeoutException()
 
+        # Signals are only delivered to the main thread, so other threads
+        # check the elapsed time once each match returns. This is equivalent
+        # as the alarm handler cannot run until the PCRE call returns either.
+        self._use_alarm = \
+            threading.current_thread() is threading.main_thread()
+        if not self._use_alarm:
+            return self
         self._previous_alarm_handler = signal.signal(
                 signal.SIGALRM,
                 handle_timeout
@@ -140,8 +232,8 @@ class RegexMatcherContext(MatcherContext):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        signal.signal(signal.SIGALRM, self._previous_alarm_handler)
-        pass
+        if self._use_alarm:
+            signal.signal(signal.SIGALRM, self._previous_alarm_handler)
 
 
 class RegexCommonString:
@@ -149,6 +241,8 @@ class RegexCommonString:
     def __init__(self, common_string: CommonString, pcre_options: PcreOptions):
         self.common_string = common_string
         self.pattern = PcrePattern(common_string.string, pcre_options)
+        self.literal = extract_literal(common_string.string)
+        self.prefiltered = False
 
 
 class RegexSignature:
@@ -157,6 +251,7 @@ class RegexSignature:
         self.signature = signature
         self.anchored_to_start = self._is_anchored_to_start()
         self.pcre_options = pcre_options
+        self._compile_lock = threading.Lock()
         if not signature.has_common_strings():
             self.compile()
 
@@ -189,7 +284,11 @@ class RegexSignature:
         # Signature patterns are compiled lazily as they are only needed if
         # common strings are matched and compiling all takes several seconds
         if not hasattr(self, 'pattern'):
-            self.compile()
+            # Worker threads share signatures, so ensure each pattern is only
+            # compiled by one of them
+            with self._compile_lock:
+                if not hasattr(self, 'pattern'):
+                    self.compile()
         return self.pattern
 
 
@@ -205,6 +304,8 @@ class RegexMatcher(Matcher):
         super().__init__(signature_set, timeout, match_all)
         self.pcre_options = pcre_options
         self._compile_regexes()
+        self.initial_common_string_states = [False] * len(self.common_strings)
+        self.literal_prefilter = self._create_literal_prefilter()
         self.signatures_without_common_strings = \
             self._extract_signatures_without_common_strings()
 
@@ -221,6 +322,20 @@ class RegexMatcher(Matcher):
                 for common_string in self.signature_set.common_strings
             ]
 
+    def _create_literal_prefilter(self) -> Optional[LiteralPrefilter]:
+        literals = {}
+        for index, common_string in enumerate(self.common_strings):
+            if common_string.literal is not None:
+                literals[index] = common_string.literal
+        if not literals:
+            return None
+        for index in literals:
+            self.common_strings[index].prefiltered = True
+        log.debug(
+                f'Prefiltering {len(literals)} literal common string(s)'
+            )
+        return LiteralPrefilter(literals, self.pcre_options.caseless)
+
     def _compile_signatures(self) -> None:
         self.signatures = {}
         for identifier, signature in self.signature_set.signatures.items():
@@ -235,3 +350,236 @@ class RegexMatcher(Matcher):
 
     def create_context(self) -> RegexMatcherContext:
         return RegexMatcherContext(self)
+
+
+class HyperscanMatcherContext(RegexMatcherContext):
+
+    def __init__(self, matcher):
+        super().__init__(matcher)
+        self.scratch = matcher.scratch.clone()
+        # The binding does not hold a reference to the match handler
+        self._match_handler = self._handle_candidate
+        self._stream = None
+        self._open_streams = None
+        self._candidates = []
+        self._pending = set()
+        self._previous_tail = None
+
+    def reset(self) -> None:
+        # The scratch space is retained, only per-file state is discarded
+        super().reset()
+        self._candidates = []
+        self._pending.clear()
+        self._previous_tail = None
+
+    def _initialize_common_string_states(self) -> list:
+        return []
+
+    def _handle_candidate(
+                self,
+                identifier: int,
+                start: int,
+                end: int,
+                flags: int,
+                context
+            ) -> None:
+        self._candidates.append(identifier)
+
+    def _get_candidates(self) -> List[RegexSignature]:
+        self._pending.update(self._candidates)
+        self._candidates = []
+        self._pending.difference_update(self.matches)
+        return [
+                self.matcher.signatures[identifier]
+                for identifier in self._pending
+            ]
+
+    def _match_across_boundary(
+                self,
+                signature: RegexSignature,
+                chunk: bytes,
+                jit_stack: PcreJitStack
+            ) -> bool:
+        if self._previous_tail is None:
+            return False
+        window = self._previous_tail + bytes(chunk[:BOUNDARY_WINDOW_SIZE])
+        return self._match_signature(signature, window, jit_stack)
+
+    def process_chunk(
+                self,
+                chunk: bytes,
+                jit_stack: PcreJitStack,
+                start: bool = False,
+            ) -> bool:
+        for signature in self.matcher.unfiltered_signatures:
+            if self._match_signature(signature, chunk, jit_stack, start) and \
+                    not self.matcher.match_all:
+                return True
+        # Stream.scan() parses its data with "s#", which rejects writable
+        # buffers, so chunks read into a reused buffer must be copied
+        data = chunk if isinstance(chunk, bytes) else bytes(chunk)
+        self._stream.scan(data, scratch=self.scratch)
+        # Hyperscan is only used as a prefilter, candidates are confirmed
+        # using PCRE as the prefiltered patterns may be approximations.
+        # Candidates that cannot be confirmed remain pending as each
+        # signature is only reported once per stream.
+        for signature in self._get_candidates():
+            if (
+                        self._match_signature(
+                            signature,
+                            chunk,
+                            jit_stack,
+                            start
+                        ) or self._match_across_boundary(
+                            signature,
+                            chunk,
+                            jit_stack
+                        )
+                    ) and not self.matcher.match_all:
+                return True
+        self._previous_tail = bytes(chunk[-BOUNDARY_WINDOW_SIZE:])
+        return False
+
+    def _open_stream(self) -> None:
+        # Streams are opened and closed using their context manager protocol
+        # and each may only be opened once
+        self._stream = self.matcher.database.stream(
+                match_event_handler=self._match_handler
+            )
+        self._open_streams = ExitStack()
+        self._open_streams.enter_context(self._stream)
+
+    def _close_stream(self) -> None:
+        if self._open_streams is not None:
+            open_streams = self._open_streams
+            self._open_streams = None
+            self._stream = None
+            # Closing a stream uses the scratch space of the database rather
+            # than that of the context, so it cannot be done concurrently
+            with self.matcher.stream_close_lock:
+                open_streams.close()
+
+    def finalize(self, jit_stack: PcreJitStack) -> None:
+        # Closing the stream reports any matches that are anchored to the end
+        self._close_stream()
+        if self.matches and not self.matcher.match_all:
+            return
+        if self._previous_tail is None:
+            return
+        for signature in self._get_candidates():
+            if self._match_signature(
+                        signature,
+                        self._previous_tail,
+                        jit_stack
+                    ) and not self.matcher.match_all:
+                return
+
+    def __enter__(self):
+        super().__enter__()
+        self._open_stream()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._close_stream()
+        super().__exit__(exc_type, exc_value, traceback)
+
+
+class HyperscanMatcher(RegexMatcher):
+
+    def __init__(
+                self,
+                signature_set: SignatureSet,
+                timeout: int = DEFAULT_TIMEOUT,
+                match_all: bool = False,
+                pcre_options: PcreOptions = PCRE_DEFAULT_OPTIONS
+            ):
+        if not HAS_HYPERSCAN:
+            raise HyperscanException('Hyperscan is not available')
+        super().__init__(signature_set, timeout, match_all, pcre_options)
+        self._compile_database()
+
+    def _compile_regexes(self) -> None:
+        # Common strings are not needed when prefiltering with Hyperscan
+        self.common_strings = []
+        self._compile_signatures()
+
+    def _get_flags(self) -> int:
+        flags = hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH \
+            | hyperscan.HS_FLAG_ALLOWEMPTY
+        if self.pcre_options.caseless:
+            flags |= hyperscan.HS_FLAG_CASELESS
+        return flags
+
+    def _create_database(self, identifiers: List[int]):
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_STREAM)
+        database.compile(
+                expressions=[
+                    self.signatures[identifier].signature.rule.encode('utf8')
+                    for identifier in identifiers
+                ],
+                ids=identifiers,
+                flags=[self._get_flags()] * len(identifiers)
+            )
+        return database
+
+    def _partition_failed(
+                self,
+                identifiers: List[int]
+            ) -> Tuple[List[int], List[int]]:
+        """Split a set of signatures that failed to compile into those that
+        are and are not supported by Hyperscan
+
+        The set is bisected, so only the halves that fail are compiled
+        further rather than compiling every signature individually."""
+        if len(identifiers) <= 1:
+            return [], identifiers
+        supported = []
+        unsupported = []
+        middle = len(identifiers) // 2
+        for half in (identifiers[:middle], identifiers[middle:]):
+            if not half:
+                continue
+            try:
+                self._create_database(half)
+                supported.extend(half)
+                continue
+            except hyperscan.error as error:
+                if len(half) == 1:
+                    log.debug(
+                            f'Signature {half[0]} is not supported by '
+                            f'Hyperscan: {error}'
+                        )
+            half_supported, half_unsupported = self._partition_failed(half)
+            supported.extend(half_supported)
+            unsupported.extend(half_unsupported)
+        return supported, unsupported
+
+    def _compile_database(self) -> None:
+        identifiers = list(self.signatures.keys())
+        if not identifiers:
+            raise HyperscanException('No signatures to compile with Hyperscan')
+        try:
+            self.database = self._create_database(identifiers)
+            unsupported = []
+        except hyperscan.error:
+            # Locate the signatures that cannot be compiled and check those
+            # with PCRE alone
+            supported, unsupported = self._partition_failed(identifiers)
+            if not supported:
+                raise HyperscanException(
+                        'No signatures could be compiled with Hyperscan'
+                    )
+            try:
+                self.database = self._create_database(supported)
+            except hyperscan.error as error:
+                raise HyperscanException(
+                        f'Hyperscan database compilation failed: {error}'
+                    ) from error
+        self.unfiltered_signatures = [
+                self.signatures[identifier] for identifier in unsupported
+            ]
+        self.scratch = hyperscan.Scratch(self.database)
+        self.stream_close_lock = threading.Lock()
+
+    def create_context(self) -> HyperscanMatcherContext:
+        return HyperscanMatcherContext(self)
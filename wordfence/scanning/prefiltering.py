@@ -0,0 +1,121 @@
+from typing import Optional, Dict, List, Set, Union
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+
+REGEX_METACHARACTERS = set('.^$|?*+()[]{}')
+
+Chunk = Union[bytes, bytearray, memoryview]
+
+
+def extract_literal(pattern: str) -> Optional[bytes]:
+    """Return the literal bytes matched by a pattern, or None if the pattern
+    contains anything other than literal (or escaped literal) characters"""
+    literal = []
+    escaped = False
+    for character in pattern:
+        if escaped:
+            if character.isalnum():
+                return None  # Character classes, back-references, etc.
+            literal.append(character)
+            escaped = False
+        elif character == '\\':
+            escaped = True
+        elif character in REGEX_METACHARACTERS:
+            return None
+        else:
+            literal.append(character)
+    if escaped or not literal:
+        return None
+    return ''.join(literal).encode('utf8')
+
+
+class LiteralPrefilter:
+    """Determines which of a set of literal strings occur in a chunk without
+    evaluating a regex for each string
+
+    If pyahocorasick is available, all literals are located in a single
+    Aho-Corasick pass. Otherwise, each literal is located using the bytes
+    substring search implemented in C by CPython, which avoids running the
+    regex engine for each literal."""
+
+    def __init__(
+                self,
+                literals: Dict[int, bytes],
+                caseless: bool = False,
+                use_automaton: bool = HAS_AHOCORASICK
+            ):
+        self.caseless = caseless
+        self._literals = self._group_literals(literals)
+        self._count = len(literals)
+        self._automaton = self._build_automaton() if use_automaton else None
+
+    def _normalize(self, value: bytes) -> bytes:
+        if self.caseless:
+            return value.lower()
+        return value
+
+    def _group_literals(
+                self,
+                literals: Dict[int, bytes]
+            ) -> Dict[bytes, List[int]]:
+        grouped = {}
+        for index, literal in literals.items():
+            grouped.setdefault(self._normalize(literal), []).append(index)
+        return grouped
+
+    def _decode(self, value: Chunk) -> str:
+        # Latin-1 maps each byte to a single character, so content is
+        # preserved exactly
+        text = str(value, 'latin-1')
+        if self.caseless:
+            # This also folds non-ASCII Latin-1 letters, which can only cause
+            # additional (harmless) prefilter matches
+            return text.lower()
+        return text
+
+    def _build_automaton(self):
+        automaton = ahocorasick.Automaton()
+        for literal, indices in self._literals.items():
+            automaton.add_word(self._decode(literal), indices)
+        automaton.make_automaton()
+        return automaton
+
+    def _find_with_automaton(self, chunk: Chunk, ignore: Set[int]) -> Set[int]:
+        found = set()
+        remaining = self._count - len(ignore)
+        for _end, indices in self._automaton.iter(self._decode(chunk)):
+            found.update(index for index in indices if index not in ignore)
+            if len(found) >= remaining:
+                break
+        return found
+
+    def _find_with_search(self, chunk: Chunk, ignore: Set[int]) -> Set[int]:
+        if isinstance(chunk, memoryview):
+            # Views do not support substring searches
+            chunk = bytes(chunk)
+        text = self._normalize(chunk)
+        found = set()
+        for literal, indices in self._literals.items():
+            if ignore.issuperset(indices):
+                continue
+            if literal in text:
+                found.update(indices)
+        return found
+
+    def find(
+                self,
+                chunk: Chunk,
+                ignore: Optional[Set[int]] = None
+            ) -> Set[int]:
+        """Return the indices of the literals present in the chunk, literals
+        whose indices are in ignore need not be located"""
+        if ignore is None:
+            ignore = set()
+        if self._automaton is not None:
+            return self._find_with_automaton(chunk, ignore)
+        return self._find_with_search(chunk, ignore)
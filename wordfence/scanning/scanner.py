@@ -1,15 +1,22 @@
 import os
 import queue
+import errno
+import stat
 import time
-from ctypes import c_bool, c_uint
+from collections import deque
+from ctypes import c_uint, c_ubyte, addressof
 from enum import IntEnum
-from multiprocessing import Queue, Process, Value
+import multiprocessing
+from multiprocessing.queues import Queue
+from multiprocessing.sharedctypes import RawArray
 from dataclasses import dataclass
-from typing import Set, Optional, Callable, Dict, NamedTuple
+from typing import Set, Optional, Callable, Dict, NamedTuple, Tuple
 from logging import Handler
+from threading import Thread
 
 from .exceptions import ScanningException
-from .matching import Matcher, RegexMatcher
+from .matching import Matcher, MatcherContext, RegexMatcher, \
+        HyperscanMatcher, HyperscanException, HAS_HYPERSCAN
 from .filtering import FileFilter, filter_any
 from ..util import timing
 from ..util.io import StreamReader
@@ -17,12 +24,34 @@ from ..util.pcre import PcreOptions, PCRE_DEFAULT_OPTIONS, PcreJitStack
 from ..intel.signatures import SignatureSet
 from ..logging import log, remove_initial_handler
 
+multiprocessing_context = multiprocessing.get_context(
+        'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    )
+"""Compiled signatures (PCRE patterns and Hyperscan databases) are native
+objects that cannot be pickled, so they are compiled once in the parent and
+shared with workers by forking regardless of the platform default (where
+forking is supported)"""
+Process = multiprocessing_context.Process
+
 MAX_PENDING_FILES = 1000  # Arbitrary limit
+FILE_BATCH_SIZE = 256
+"""The number of located paths sent to workers in each queue item"""
+MAX_PENDING_FILE_BATCHES = max(1, MAX_PENDING_FILES // FILE_BATCH_SIZE)
 MAX_PENDING_RESULTS = 100
-QUEUE_READ_TIMEOUT = 0
+ITEM_ARRIVAL_TIMEOUT = 0.001
+"""How long (in seconds) a worker initially waits for a work queue item that
+has been counted but not yet received before checking the other shards"""
 DEFAULT_CHUNK_SIZE = 1024 * 1024
 FILE_LOCATOR_WORKER_INDEX = 0
 """Used by the file locator process when sending events"""
+EVENT_BATCH_SIZE = 64
+"""The maximum number of events buffered by a worker before sending"""
+EVENT_BATCH_INTERVAL = 0.1
+"""The maximum time (in seconds) a worker buffers events before sending"""
+O_NOATIME = getattr(os, 'O_NOATIME', 0)
+CACHE_LINE_PAIR_SIZE = 128
+"""Size of the region reserved for each shared value to avoid false sharing
+(a pair of cache lines, as adjacent lines are prefetched together)"""
 
 
 class ScanConfigurationException(ScanningException):
@@ -39,6 +68,14 @@ class ScanEventType(IntEnum):
     LOG_MESSAGE = 6
 
 
+IMMEDIATE_EVENT_TYPES = {
+        ScanEventType.COMPLETED,
+        ScanEventType.FILE_QUEUE_EMPTIED,
+        ScanEventType.FATAL_EXCEPTION
+    }
+"""Event types that are sent without waiting for a batch to fill"""
+
+
 class EventQueueLogHandler(Handler):
 
     def __init__(self, event_queue: Queue, worker_index: int):
@@ -78,10 +115,45 @@ class Options:
     path_source: Optional[StreamReader] = None
     scanned_content_limit: Optional[int] = None
     file_filter: Optional[FileFilter] = None
+    max_file_size: Optional[int] = None
     match_all: bool = False
     pcre_options: PcreOptions = PCRE_DEFAULT_OPTIONS
 
 
+class PaddedValue:
+    """A shared value that occupies its own pair of cache lines
+
+    Unlike multiprocessing.Value, no lock is used, so this is only suitable
+    for single-word values that are written by one process at a time."""
+
+    def __init__(self, type, value=0):
+        self._type = type
+        # Allocate enough to align the value to a line boundary within the
+        # (8-byte aligned) shared heap block
+        self._buffer = RawArray(c_ubyte, CACHE_LINE_PAIR_SIZE * 2)
+        self._initialize_view()
+        self.value = value
+
+    def _initialize_view(self) -> None:
+        offset = -addressof(self._buffer) % CACHE_LINE_PAIR_SIZE
+        self._value = self._type.from_buffer(self._buffer, offset)
+
+    def __getstate__(self):
+        return (self._type, self._buffer)
+
+    def __setstate__(self, state) -> None:
+        self._type, self._buffer = state
+        self._initialize_view()
+
+    @property
+    def value(self):
+        return self._value.value
+
+    @value.setter
+    def value(self, value) -> None:
+        self._value.value = value
+
+
 class Status(IntEnum):
     LOCATING_FILES = 0
     PROCESSING_FILES = 1
@@ -89,40 +161,151 @@ class Status(IntEnum):
     FAILED = 3
 
 
+class ShardedQueue:
+    """A queue split into one shard per consumer
+
+    Consumers read from their own shard first, so they do not all contend
+    for a single queue lock, and take items from other shards when their own
+    is empty. A shared semaphore counts the items across all shards, so idle
+    consumers block until one is available rather than polling the shards.
+    Each shard ends with a sentinel (None) and each consumer receives exactly
+    one sentinel, after which it must stop reading from the queue."""
+
+    def __init__(self, shard_count: int, shard_size: int):
+        self._shards = [
+                multiprocessing_context.Queue(shard_size)
+                for _ in range(shard_count)
+            ]
+        self._available = multiprocessing_context.Semaphore(0)
+        self._next_shard = 0
+
+    def _put(self, index: int, item, block: bool = True) -> None:
+        self._shards[index].put(item, block=block)
+        self._available.release()
+
+    def put(self, item) -> None:
+        """Add an item to the next shard with space available, blocking if
+        all shards are full"""
+        count = len(self._shards)
+        for offset in range(count):
+            index = (self._next_shard + offset) % count
+            try:
+                self._put(index, item, block=False)
+                self._next_shard = (index + 1) % count
+                return
+            except queue.Full:
+                continue
+        self._put(self._next_shard, item)
+        self._next_shard = (self._next_shard + 1) % count
+
+    def put_end(self) -> None:
+        for index in range(len(self._shards)):
+            self._put(index, None)
+
+    def get(self, index: int):
+        """Get the next item for the consumer of the given shard, blocking
+        until one is available"""
+        self._available.acquire()
+        count = len(self._shards)
+        timeout = ITEM_ARRIVAL_TIMEOUT
+        while True:
+            for offset in range(count):
+                shard = self._shards[(index + offset) % count]
+                try:
+                    return shard.get(block=False)
+                except queue.Empty:
+                    continue
+            # Items are written to the shards by a feeder thread, so an item
+            # that has been counted may not have arrived yet
+            try:
+                return self._shards[index].get(timeout=timeout)
+            except queue.Empty:
+                timeout *= 2
+
+
 class FileLocator:
 
     def __init__(self, path: str,
-                 queue: Queue,
+                 queue: ShardedQueue,
                  file_filter: FileFilter,
+                 max_file_size: Optional[int] = None
                  ):
         self.path = path
         self.queue = queue
         self.file_filter = file_filter
+        self.max_file_size = max_file_size
         self.located_count = 0
+        self._batch = []
+
+    def _add_to_batch(self, path: str) -> None:
+        self._batch.append(path)
+        if len(self._batch) >= FILE_BATCH_SIZE:
+            self.flush()
 
-    def search_directory(self, path: str):
+    def flush(self) -> None:
+        if self._batch:
+            self.queue.put(self._batch)
+            self._batch = []
+
+    def _is_within_size_limit(self, size: int) -> bool:
+        return self.max_file_size is None or size <= self.max_file_size
+
+    def _is_too_large(self, get_size: Callable[[], int]) -> bool:
+        if self.max_file_size is None:
+            return False
         try:
-            contents = os.scandir(path)
+            size = get_size()
+        except OSError:
+            # The file is still queued so that the error is reported when
+            # it is processed, as it would be without a size limit
+            return False
+        return not self._is_within_size_limit(size)
+
+    def _add_directory_entries(self, path: str, directories: deque) -> None:
+        with os.scandir(path) as contents:
             for item in contents:
+                # The entry type is known from scandir for anything other
+                # than a symlink, so these only stat links (which are
+                # followed)
                 if item.is_dir():
-                    yield from self.search_directory(item.path)
+                    directories.append(item.path)
                 elif item.is_file():
                     if not self.file_filter.filter(item.path):
                         continue
+                    if self._is_too_large(lambda: item.stat().st_size):
+                        log.debug('Skipping large file: %s', item.path)
+                        continue
                     self.located_count += 1
-                    yield item.path
+                    # Formatting is deferred as this is logged for every file
+                    log.debug('File added to scan queue: %s', item.path)
+                    self._add_to_batch(item.path)
+
+    def search_directory(self, path: str) -> None:
+        directories = deque([path])
+        visited = set()
+        try:
+            while directories:
+                directory = directories.pop()
+                status = os.stat(directory)
+                key = (status.st_dev, status.st_ino)
+                if key in visited:
+                    # Reached again through a link, possibly a loop
+                    log.debug(f'Skipping visited directory: {directory}')
+                    continue
+                visited.add(key)
+                self._add_directory_entries(directory, directories)
         except OSError as os_error:
             raise ScanningException('Directory search failed') from os_error
 
     def locate(self):
-        # TODO: Handle links and prevent loops
         real_path = os.path.realpath(self.path)
         if os.path.isdir(real_path):
-            for path in self.search_directory(real_path):
-                log.debug(f'File added to scan queue: {path}')
-                self.queue.put(path)
+            self.search_directory(real_path)
+        elif self._is_too_large(lambda: os.path.getsize(real_path)):
+            log.debug(f'Skipping large file: {real_path}')
         else:
-            self.queue.put(real_path)
+            self._add_to_batch(real_path)
+        self.flush()
 
 
 class FileLocatorProcess(Process):
@@ -130,16 +313,24 @@ class FileLocatorProcess(Process):
     def __init__(
                 self,
                 input_queue_size: int = 10,
-                output_queue_size: int = MAX_PENDING_FILES,
+                output_queue_size: Optional[int] = None,
                 file_filter: FileFilter = None,
+                max_file_size: Optional[int] = None,
                 use_log_events: bool = False,
-                event_queue: Optional[Queue] = None
+                event_queue: Optional[Queue] = None,
+                worker_count: int = 1
             ):
-        self._input_queue = Queue(input_queue_size)
-        self.output_queue = Queue(output_queue_size)
+        self._input_queue = multiprocessing_context.Queue(input_queue_size)
+        if output_queue_size is None:
+            output_queue_size = max(
+                    1,
+                    MAX_PENDING_FILE_BATCHES // worker_count
+                )
+        self.output_queue = ShardedQueue(worker_count, output_queue_size)
         self.file_filter = file_filter \
             if file_filter is not None \
             else FileFilter([filter_any])
+        self.max_file_size = max_file_size
         if use_log_events and not event_queue:
             raise ValueError('Using log events requires an event queue')
         self._use_log_events = use_log_events
@@ -159,9 +350,6 @@ class FileLocatorProcess(Process):
                     'At least one scan path must be specified'
                 )
 
-    def get_next_file(self):
-        return self.output_queue.get()
-
     def run(self):
         if self._use_log_events:
             use_event_queue_log_handler(
@@ -173,19 +361,17 @@ class FileLocatorProcess(Process):
                 locator = FileLocator(
                         path=path,
                         file_filter=self.file_filter,
+                        max_file_size=self.max_file_size,
                         queue=self.output_queue
                     )
                 locator.locate()
-            self.output_queue.put(None)
         except ScanningException as exception:
             self.output_queue.put(exception)
+        self.output_queue.put_end()
 
 
 class ScanEvent:
 
-    # TODO: Define custom (more compact) pickle serialization format for this
-    # class as a potential performance improvement
-
     def __init__(
                 self,
                 type: int,
@@ -196,10 +382,56 @@ class ScanEvent:
         self.data = data
         self.worker_index = worker_index
 
+    def __reduce__(self):
+        # Events are pickled as bare tuples to avoid including the class
+        # layout, attribute names and enum references in every event
+        if self.type == ScanEventType.FILE_PROCESSED:
+            return (
+                    _rebuild_file_processed_event,
+                    (
+                        self.worker_index,
+                        self.data['path'],
+                        self.data['length'],
+                        self.data['matches'] or None,
+                        self.data['timeouts'] or None
+                    )
+                )
+        return (
+                _rebuild_scan_event,
+                (int(self.type), self.data, self.worker_index)
+            )
+
+
+def _rebuild_scan_event(
+            type: int,
+            data,
+            worker_index: Optional[int]
+        ) -> ScanEvent:
+    return ScanEvent(ScanEventType(type), data, worker_index)
+
+
+def _rebuild_file_processed_event(
+            worker_index: int,
+            path: str,
+            length: int,
+            matches: Optional[Dict[int, bytes]],
+            timeouts: Optional[Set[int]]
+        ) -> ScanEvent:
+    return ScanEvent(
+            ScanEventType.FILE_PROCESSED,
+            {
+                'path': path,
+                'length': length,
+                'matches': matches if matches is not None else {},
+                'timeouts': timeouts if timeouts is not None else set()
+            },
+            worker_index
+        )
+
 
-class ScanProgressMonitor(Process):
+class BaseScanProgressMonitor:
 
-    def __init__(self, status: Value, event_queue: Queue):
+    def __init__(self, status: PaddedValue, event_queue: Queue):
         super().__init__(name='progress-monitor')
         self._event_queue = event_queue
         self._status = status
@@ -214,13 +446,47 @@ class ScanProgressMonitor(Process):
             self._event_queue.put(ScanEvent(ScanEventType.PROGRESS_UPDATE))
 
 
-class ScanWorker(Process):
+class ScanProgressMonitor(BaseScanProgressMonitor, Process):
+    pass
+
+
+class ScanProgressMonitorThread(BaseScanProgressMonitor, Thread):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.daemon = True
+        self._terminated = False
+
+    def is_scan_running(self) -> bool:
+        return not self._terminated and super().is_scan_running()
+
+    def terminate(self):
+        self._terminated = True
+
+
+class EventRelayThread(Thread):
+    """Forwards events sent by another process to a queue that is only used
+    within this process"""
+
+    def __init__(self, source: Queue, destination: queue.Queue):
+        super().__init__(name='event-relay', daemon=True)
+        self._source = source
+        self._destination = destination
+
+    def run(self):
+        while (event := self._source.get()) is not None:
+            self._destination.put(event)
+
+    def stop(self):
+        self._source.put(None)
+
+
+class BaseScanWorker:
 
     def __init__(
                 self,
                 index: int,
-                status: Value,
-                work_queue: Queue,
+                work_queue: ShardedQueue,
                 event_queue: Queue,
                 matcher: Matcher,
                 chunk_size: int = DEFAULT_CHUNK_SIZE,
@@ -228,7 +494,6 @@ class ScanWorker(Process):
                 use_log_events: bool = False
             ):
         self.index = index
-        self._status = status
         self._work_queue = work_queue
         self._event_queue = event_queue
         self._matcher = matcher
@@ -236,7 +501,10 @@ class ScanWorker(Process):
         self._working = True
         self._scanned_content_limit = scanned_content_limit
         self._use_log_events = use_log_events
-        self.complete = Value(c_bool, False)
+        self._pending_events = []
+        self._last_event_flush = time.monotonic()
+        self._buffer = None
+        self._use_noatime = O_NOATIME != 0
         super().__init__(name=self._generate_name())
 
     def _generate_name(self) -> str:
@@ -247,37 +515,53 @@ class ScanWorker(Process):
         log.debug(f'Worker {self.index} started, PID:' + str(os.getpid()))
         with PcreJitStack() as jit_stack:
             while self._working:
-                try:
-                    item = self._work_queue.get(timeout=QUEUE_READ_TIMEOUT)
-                    if item is None:
-                        self._put_event(ScanEventType.FILE_QUEUE_EMPTIED)
-                        self._complete()
-                    elif isinstance(item, BaseException):
+                # Send any buffered events before potentially blocking
+                self._flush_events()
+                item = self._work_queue.get(self.index)
+                if item is None:
+                    self._put_event(ScanEventType.FILE_QUEUE_EMPTIED)
+                    self._complete()
+                elif isinstance(item, BaseException):
+                    self._put_event(
+                            ScanEventType.FATAL_EXCEPTION,
+                            {'exception': item}
+                        )
+                else:
+                    try:
+                        for path in item:
+                            self._process_file(path, jit_stack)
+                    except ScanningException as exception:
                         self._put_event(
                                 ScanEventType.FATAL_EXCEPTION,
-                                {'exception': item}
+                                {'exception': exception}
                             )
-                    else:
-                        self._process_file(item, jit_stack)
-                except queue.Empty:
-                    if self._status.value == Status.PROCESSING_FILES:
-                        self._complete()
+                        self._working = False
+
+    def _flush_events(self) -> None:
+        if self._pending_events:
+            self._event_queue.put(self._pending_events)
+            self._pending_events = []
+        self._last_event_flush = time.monotonic()
+
+    def _should_flush_events(self, event_type: ScanEventType) -> bool:
+        return event_type in IMMEDIATE_EVENT_TYPES \
+            or len(self._pending_events) >= EVENT_BATCH_SIZE \
+            or time.monotonic() - self._last_event_flush \
+            >= EVENT_BATCH_INTERVAL
 
     def _put_event(self, event_type: ScanEventType, data: dict = None) -> None:
         if data is None:
             data = {}
-        self._event_queue.put(
+        self._pending_events.append(
                 ScanEvent(event_type, data, worker_index=self.index)
             )
+        if self._should_flush_events(event_type):
+            self._flush_events()
 
     def _complete(self):
         self._working = False
-        self.complete.value = True
         self._put_event(ScanEventType.COMPLETED)
 
-    def is_complete(self) -> bool:
-        return self.complete.value
-
     def _get_next_chunk_size(self, length: int) -> int:
         if self._scanned_content_limit is None:
             return self._chunk_size
@@ -286,31 +570,128 @@ class ScanWorker(Process):
         else:
             return min(self._scanned_content_limit - length, self._chunk_size)
 
-    def _process_file(self, path: str, jit_stack: PcreJitStack):
-        try:
-            log.debug(f'Processing file: {path}')
-            with open(path, mode='rb') as file, \
-                    self._matcher.create_context() as context:
-                length = 0
-                while (chunk_size := self._get_next_chunk_size(length)):
-                    chunk = file.read(chunk_size)
-                    if not chunk:
+    def _open_file(self, path: str) -> int:
+        if self._use_noatime:
+            try:
+                return os.open(path, os.O_RDONLY | O_NOATIME)
+            except PermissionError as error:
+                # O_NOATIME is only permitted for the owner of a file
+                if error.errno != errno.EPERM:
+                    raise
+                self._use_noatime = False
+        return os.open(path, os.O_RDONLY)
+
+    def _get_buffer(self, size: int) -> bytearray:
+        if self._buffer is None or len(self._buffer) < size:
+            self._buffer = bytearray(size)
+        return self._buffer
+
+    def _read_chunk(self, fd: int, view: memoryview) -> int:
+        """Fill the view from the file, returning the number of bytes read"""
+        offset = 0
+        while offset < len(view):
+            with view[offset:] as remaining:
+                read = os.readv(fd, [remaining])
+            if read == 0:
+                break
+            offset += read
+        return offset
+
+    def _process_stream(
+                self,
+                fd: int,
+                context: MatcherContext,
+                jit_stack: PcreJitStack,
+                size: Optional[int] = None
+            ) -> int:
+        """Read and process the file in chunks, if the size is known (i.e.
+        for regular files), reading stops once that many bytes are read"""
+        buffer_size = self._get_next_chunk_size(0)
+        if size is not None:
+            buffer_size = min(buffer_size, size)
+        if hasattr(os, 'posix_fadvise') \
+                and (size is None or size > buffer_size):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass  # Not supported for pipes, etc.
+        length = 0
+        buffer = self._get_buffer(buffer_size)
+        with memoryview(buffer) as view:
+            while (chunk_size := self._get_next_chunk_size(length)):
+                if size is not None:
+                    if length >= size:
                         break
+                    # Avoid an additional read to detect the end of the file
+                    chunk_size = min(chunk_size, size - length)
+                with view[:chunk_size] as target:
+                    read = self._read_chunk(fd, target)
+                if read == 0:
+                    break
+                with view[:read] as chunk:
                     first = length == 0
-                    length += len(chunk)
-                    if context.process_chunk(chunk, first, jit_stack):
+                    length += read
+                    if context.process_chunk(chunk, jit_stack, first):
                         break
-                self._put_event(
-                        ScanEventType.FILE_PROCESSED,
-                        {
-                            'path': path,
-                            'length': length,
-                            'matches': context.matches,
-                            'timeouts': context.timeouts
-                        }
+        return length
+
+    def _match_file(
+                self,
+                fd: int,
+                status: os.stat_result,
+                jit_stack: PcreJitStack
+            ) -> Tuple[int, Dict[int, str], Set[int]]:
+        context = self._matcher.acquire_context()
+        try:
+            with context:
+                # Files are read rather than mapped as accessing a mapping of
+                # a file truncated while it is being scanned raises SIGBUS
+                length = self._process_stream(
+                        fd,
+                        context,
+                        jit_stack,
+                        status.st_size
+                        if stat.S_ISREG(status.st_mode) else None
                     )
+                context.finalize(jit_stack)
+            return length, context.matches, context.timeouts
+        finally:
+            self._matcher.release_context(context)
+
+    def _process_file(self, path: str, jit_stack: PcreJitStack):
+        try:
+            log.debug('Processing file: %s', path)
+            fd = self._open_file(path)
+            try:
+                status = os.fstat(fd)
+                if stat.S_ISREG(status.st_mode) and status.st_size == 0:
+                    # There is nothing to match in an empty file
+                    length, matches, timeouts = 0, {}, set()
+                else:
+                    length, matches, timeouts = \
+                        self._match_file(fd, status, jit_stack)
+            finally:
+                os.close(fd)
+            self._put_event(
+                    ScanEventType.FILE_PROCESSED,
+                    {
+                        'path': path,
+                        'length': length,
+                        'matches': matches,
+                        'timeouts': timeouts
+                    }
+                )
         except OSError as error:
             self._put_event(ScanEventType.EXCEPTION, {'exception': error})
+        except Exception as error:
+            # Anything else is a failure of the matcher rather than a problem
+            # with the file, so the scan cannot continue
+            raise ScanningException(
+                    f'Failed to process file {path}: {error}'
+                ) from error
+
+
+class ScanWorker(BaseScanWorker, Process):
 
     def run(self):
         if self._use_log_events:
@@ -318,6 +699,29 @@ class ScanWorker(Process):
         self.work()
 
 
+class ScanWorkerThread(BaseScanWorker, Thread):
+    """A scan worker for matchers that do not hold the GIL while matching
+
+    Threads share the matcher of the parent process, so no IPC is needed to
+    distribute it. Log messages are handled directly as they are already
+    within the main process."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.daemon = True
+
+    def _generate_name(self) -> str:
+        return 'worker-thread-' + str(self.index)
+
+    def run(self):
+        self.work()
+
+    def terminate(self):
+        # Threads cannot be killed, the worker will stop after its current
+        # batch (and exit with the process as it is a daemon)
+        self._working = False
+
+
 class ScanResult:
 
     def __init__(
@@ -348,41 +752,53 @@ class ScanMetrics:
         self.bytes = self._initialize_int_metric(worker_count)
         self.matches = self._initialize_int_metric(worker_count)
         self.timeouts = self._initialize_int_metric(worker_count)
+        self._totals = {
+                'counts': 0,
+                'bytes': 0,
+                'matches': 0,
+                'timeouts': 0
+            }
 
     def _initialize_int_metric(self, worker_count: int):
         return [0] * worker_count
 
+    def _increment_int_metric(
+                self,
+                metric: str,
+                worker_index: int,
+                amount: int = 1
+            ) -> None:
+        getattr(self, metric)[worker_index] += amount
+        self._totals[metric] += amount
+
     def record_result(self, worker_index: int, result: ScanResult):
-        self.counts[worker_index] += 1
-        self.bytes[worker_index] += result.read_length
+        self._increment_int_metric('counts', worker_index)
+        self._increment_int_metric('bytes', worker_index, result.read_length)
         if result.has_matches():
-            self.matches[worker_index] += 1
-        self.timeouts[worker_index] += result.get_timeout_count()
-
-    def _aggregate_int_metric(self, metric: list) -> int:
-        total = 0
-        for value in metric:
-            total += value
-        return total
+            self._increment_int_metric('matches', worker_index)
+        self._increment_int_metric(
+                'timeouts',
+                worker_index,
+                result.get_timeout_count()
+            )
 
     def get_total_count(self) -> int:
-        return self._aggregate_int_metric(self.counts)
+        return self._totals['counts']
 
     def get_total_bytes(self) -> int:
-        return self._aggregate_int_metric(self.bytes)
+        return self._totals['bytes']
 
     def get_total_matches(self) -> int:
-        return self._aggregate_int_metric(self.matches)
+        return self._totals['matches']
 
     def get_total_timeouts(self) -> int:
-        return self._aggregate_int_metric(self.timeouts)
+        return self._totals['timeouts']
 
     def get_int_metric(self, metric: str, worker_index: Optional[int] = None):
-        values = getattr(self, metric)
         if worker_index is not None:
-            return values[worker_index]
+            return getattr(self, metric)[worker_index]
         else:
-            return self._aggregate_int_metric(values)
+            return self._totals[metric]
 
 
 class ScanProgressUpdate:
@@ -437,7 +853,7 @@ class ScanWorkerPool:
     def __init__(
                 self,
                 size: int,
-                work_queue: Queue,
+                work_queue: ShardedQueue,
                 event_queue: Queue,
                 matcher: Matcher,
                 metrics: ScanMetrics,
@@ -445,7 +861,8 @@ class ScanWorkerPool:
                 progress_receiver: Optional[ProgressReceiverCallback] = None,
                 chunk_size: int = DEFAULT_CHUNK_SIZE,
                 scanned_content_limit: Optional[int] = None,
-                use_log_events: bool = False
+                use_log_events: bool = False,
+                use_threads: bool = False
             ):
         self.size = size
         self._matcher = matcher
@@ -458,6 +875,7 @@ class ScanWorkerPool:
         self._scanned_content_limit = scanned_content_limit
         self._started = False
         self._use_log_events = use_log_events
+        self._use_threads = use_threads
 
     def __enter__(self):
         self.start()
@@ -483,10 +901,13 @@ class ScanWorkerPool:
     def start(self):
         if self._started:
             raise ScanningException('Worker pool has already been started')
-        self._status = Value(c_uint, Status.LOCATING_FILES)
+        self._status = PaddedValue(c_uint, Status.LOCATING_FILES)
         self._workers = []
+        self._completed_count = 0
         if self.has_progress_receiver():
-            self._monitor = ScanProgressMonitor(
+            monitor_type = ScanProgressMonitorThread if self._use_threads \
+                else ScanProgressMonitor
+            self._monitor = monitor_type(
                     self._status,
                     self._event_queue
                 )
@@ -494,10 +915,10 @@ class ScanWorkerPool:
             self._send_progress_update()
         else:
             self._monitor = None
+        worker_type = ScanWorkerThread if self._use_threads else ScanWorker
         for i in range(self.size):
-            worker = ScanWorker(
+            worker = worker_type(
                     i,
-                    self._status,
                     self._work_queue,
                     self._event_queue,
                     self._matcher,
@@ -529,10 +950,56 @@ class ScanWorkerPool:
 
     def is_complete(self) -> bool:
         self._assert_started()
-        for worker in self._workers:
-            if not worker.is_complete():
-                return False
-        return True
+        return self._completed_count == self.size
+
+    def _process_event(
+                self,
+                event: ScanEvent,
+                result_processor: ScanResultCallback
+            ) -> None:
+        if event.type == ScanEventType.COMPLETED:
+            self._completed_count += 1
+            if event.worker_index != FILE_LOCATOR_WORKER_INDEX:
+                log.debug(f'Worker {event.worker_index} completed')
+            else:
+                log.debug("File locator process exited")
+            if self.is_complete():
+                self._event_queue.put(None)
+        elif event.type == ScanEventType.FILE_PROCESSED:
+            result = ScanResult(
+                    event.data['path'],
+                    event.data['length'],
+                    event.data['matches'],
+                    event.data['timeouts']
+                )
+            if result.get_timeout_count() > 0:
+                log.warning(
+                        'The following signatures timed out while '
+                        f'processing {result.path}: ' +
+                        ', '.join({str(i) for i in result.timeouts})
+                    )
+            self.metrics.record_result(
+                    event.worker_index,
+                    result
+                )
+            result_processor(result)
+        elif event.type == ScanEventType.FILE_QUEUE_EMPTIED:
+            self._status.value = Status.PROCESSING_FILES
+        elif event.type == ScanEventType.EXCEPTION:
+            log.error(
+                    'Exception occurred while processing file: ' +
+                    str(event.data['exception'])
+                )
+        elif event.type == ScanEventType.FATAL_EXCEPTION:
+            self._status.value = Status.FAILED
+            self.terminate()
+            raise event.data['exception']
+        elif event.type == ScanEventType.PROGRESS_UPDATE:
+            self._send_progress_update()
+        elif event.type == ScanEventType.LOG_MESSAGE:
+            message: str = event.data['message']
+            method = getattr(log, event.data['level'].lower())
+            method(message)
 
     def await_results(
                 self,
@@ -540,54 +1007,17 @@ class ScanWorkerPool:
             ):
         self._assert_started()
         while True:
-            event = self._event_queue.get()
-            if event is None:
+            item = self._event_queue.get()
+            if item is None:
                 log.debug('All workers have completed and all results have '
                           'been processed.')
                 self._status.value = Status.COMPLETE
                 return
-            elif event.type == ScanEventType.COMPLETED:
-                if event.worker_index != FILE_LOCATOR_WORKER_INDEX:
-                    log.debug(f'Worker {event.worker_index} completed')
-                else:
-                    log.debug("File locator process exited")
-                if self.is_complete():
-                    self._event_queue.put(None)
-            elif event.type == ScanEventType.FILE_PROCESSED:
-                result = ScanResult(
-                        event.data['path'],
-                        event.data['length'],
-                        event.data['matches'],
-                        event.data['timeouts']
-                    )
-                if result.get_timeout_count() > 0:
-                    log.warning(
-                            'The following signatures timed out while '
-                            f'processing {result.path}: ' +
-                            ', '.join({str(i) for i in result.timeouts})
-                        )
-                self.metrics.record_result(
-                        event.worker_index,
-                        result
-                    )
-                result_processor(result)
-            elif event.type == ScanEventType.FILE_QUEUE_EMPTIED:
-                self._status.value = Status.PROCESSING_FILES
-            elif event.type == ScanEventType.EXCEPTION:
-                log.error(
-                        'Exception occurred while processing file: ' +
-                        str(event.data['exception'])
-                    )
-            elif event.type == ScanEventType.FATAL_EXCEPTION:
-                self._status.value = Status.FAILED
-                self.terminate()
-                raise event.data['exception']
-            elif event.type == ScanEventType.PROGRESS_UPDATE:
-                self._send_progress_update()
-            elif event.type == ScanEventType.LOG_MESSAGE:
-                message: str = event.data['message']
-                method = getattr(log, event.data['level'].lower())
-                method(message)
+            # Workers send events in batches, other processes send them
+            # individually
+            events = item if isinstance(item, list) else [item]
+            for event in events:
+                self._process_event(event, result_processor)
 
     def is_failed(self) -> bool:
         return self._status.value == Status.FAILED
@@ -603,6 +1033,27 @@ class Scanner:
         self.failed += 1
         raise error
 
+    def _create_matcher(self) -> Matcher:
+        if HAS_HYPERSCAN:
+            try:
+                matcher = HyperscanMatcher(
+                        self.options.signatures,
+                        match_all=self.options.match_all,
+                        pcre_options=self.options.pcre_options
+                    )
+                log.debug('Using Hyperscan signature prefilter')
+                return matcher
+            except HyperscanException as exception:
+                log.warning(
+                        'Unable to use Hyperscan, falling back to PCRE: '
+                        f'{exception}'
+                    )
+        return RegexMatcher(
+                self.options.signatures,
+                match_all=self.options.match_all,
+                pcre_options=self.options.pcre_options
+            )
+
     def scan(
                 self,
                 result_processor: ScanResultCallback,
@@ -613,45 +1064,76 @@ class Scanner:
             ):
         """Run a scan"""
         timer = timing.Timer()
-        event_queue = Queue(MAX_PENDING_RESULTS)
+        locator_event_queue = \
+            multiprocessing_context.Queue(MAX_PENDING_RESULTS) \
+            if use_log_events else None
+        worker_count = self.options.workers
         file_locator_process = FileLocatorProcess(
                 file_filter=self.options.file_filter,
+                max_file_size=self.options.max_file_size,
                 use_log_events=use_log_events,
-                event_queue=event_queue if use_log_events else None
+                event_queue=locator_event_queue,
+                worker_count=worker_count
             )
         file_locator_process.start()
         for path in self.options.paths:
             file_locator_process.add_path(path)
-        worker_count = self.options.workers
-        log.debug("Using " + str(worker_count) + " worker(s)...")
-        matcher = RegexMatcher(
-                    self.options.signatures,
-                    match_all=self.options.match_all,
-                    pcre_options=self.options.pcre_options
-                )
+        matcher = self._create_matcher()
+        # Hyperscan scans without holding the GIL (as do the PCRE calls used
+        # to confirm its matches), so threads can scan in parallel without
+        # the overhead of worker processes
+        use_threads = isinstance(matcher, HyperscanMatcher)
+        worker_type = 'thread(s)' if use_threads else 'process(es)'
+        log.debug(f'Using {worker_count} worker {worker_type}...')
+        event_relay = None
+        if use_threads:
+            # Events from worker threads do not need to be pickled and sent
+            # through a pipe, only those from the locator process are
+            event_queue = queue.Queue(MAX_PENDING_RESULTS)
+            if locator_event_queue is not None:
+                event_relay = EventRelayThread(
+                        locator_event_queue,
+                        event_queue
+                    )
+                event_relay.start()
+        elif locator_event_queue is not None:
+            event_queue = locator_event_queue
+        else:
+            event_queue = multiprocessing_context.Queue(MAX_PENDING_RESULTS)
         metrics = ScanMetrics(worker_count)
-        with ScanWorkerPool(
-                    size=worker_count,
-                    work_queue=file_locator_process.output_queue,
-                    event_queue=event_queue,
-                    matcher=matcher,
-                    metrics=metrics,
-                    timer=timer,
-                    progress_receiver=progress_receiver,
-                    chunk_size=self.options.chunk_size,
-                    scanned_content_limit=self.options.scanned_content_limit,
-                    use_log_events=use_log_events
-                ) as worker_pool:
-            if self.options.path_source is not None:
-                log.debug('Reading input paths...')
-                while True:
-                    path = self.options.path_source.read_entry()
-                    if path is None:
-                        break
-                    file_locator_process.add_path(path)
-            file_locator_process.finalize_paths()
-            log.debug('Awaiting results...')
-            worker_pool.await_results(result_processor)
+        try:
+            with ScanWorkerPool(
+                        size=worker_count,
+                        work_queue=file_locator_process.output_queue,
+                        event_queue=event_queue,
+                        matcher=matcher,
+                        metrics=metrics,
+                        timer=timer,
+                        progress_receiver=progress_receiver,
+                        chunk_size=self.options.chunk_size,
+                        scanned_content_limit=(
+                            self.options.scanned_content_limit
+                        ),
+                        use_log_events=use_log_events,
+                        use_threads=use_threads
+                    ) as worker_pool:
+                if self.options.path_source is not None:
+                    log.debug('Reading input paths...')
+                    while True:
+                        path = self.options.path_source.read_entry()
+                        if path is None:
+                            break
+                        file_locator_process.add_path(path)
+                file_locator_process.finalize_paths()
+                log.debug('Awaiting results...')
+                worker_pool.await_results(result_processor)
+        except BaseException:
+            # The locator may otherwise remain blocked on a full work queue
+            file_locator_process.terminate()
+            raise
+        finally:
+            if event_relay is not None:
+                event_relay.stop()
         timer.stop()
         scan_finished_handler = scan_finished_handler if scan_finished_handler\
             else default_scan_finished_handler
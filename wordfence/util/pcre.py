@@ -1,8 +1,8 @@
-from ctypes import cdll, c_char_p, c_void_p, c_int, c_ulong, c_ubyte, byref, \
-        Structure, POINTER, CFUNCTYPE
+from ctypes import cdll, c_char, c_char_p, c_void_p, c_int, c_ulong, c_ubyte, \
+        byref, Structure, POINTER, CFUNCTYPE
 from ctypes.util import find_library
 from enum import IntEnum
-from typing import Optional
+from typing import Optional, Union
 
 
 class PcreException(Exception):
@@ -252,6 +252,17 @@ class PcreOptions:
 PCRE_DEFAULT_OPTIONS = PcreOptions()
 
 
+Subject = Union[bytes, bytearray, memoryview]
+
+
+def _get_subject_pointer(subject: Subject):
+    if isinstance(subject, bytes):
+        return c_char_p(subject)
+    # Writable buffers (i.e. bytearrays) can be passed to PCRE directly
+    # without copying their contents
+    return (c_char * len(subject)).from_buffer(subject)
+
+
 class PcrePattern:
 
     def __init__(
@@ -293,7 +304,7 @@ class PcrePattern:
 
     def match(
                 self,
-                subject: bytes,
+                subject: Subject,
                 jit_stack: PcreJitStack = None
             ) -> Optional[PcreMatch]:
         if jit_stack is None and HAS_JIT_SUPPORT:
@@ -301,7 +312,7 @@ class PcrePattern:
             temporary_jit_stack = True
         else:
             temporary_jit_stack = False
-        subject_cstr = c_char_p(subject)
+        subject_cstr = _get_subject_pointer(subject)
         subject_length = c_int(len(subject))
         start_offset = c_int(0)
         options = c_int(0)
@@ -348,7 +359,7 @@ class PcrePattern:
                         f'Matching failed with unknown error: {result}'
                     )
         else:
-            matched_string = subject[ovector[0]:ovector[1]]
+            matched_string = bytes(subject[ovector[0]:ovector[1]])
             return PcreMatch(matched_string)
 
     def _free(self) -> None: